@@ -8,9 +8,10 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import Base
-from app.config import config as app_config
+from app.config import get_config
 
 config = context.config
+app_config = get_config()
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
@@ -0,0 +1,33 @@
+"""add hot path indexes
+
+Revision ID: 7c1f4e2a9b3d
+Revises: 46e418b01990
+Create Date: 2026-10-15 10:12:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1f4e2a9b3d'
+down_revision: Union[str, None] = '46e418b01990'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_requests_created_at_desc',
+        'requests',
+        [sa.text('created_at DESC')],
+        unique=False,
+    )
+    op.create_index('ix_trips_request_id', 'trips', ['request_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trips_request_id', table_name='trips')
+    op.drop_index('ix_requests_created_at_desc', table_name='requests')
@@ -0,0 +1,31 @@
+"""add locations trip order index
+
+Revision ID: b84d0e6c25f1
+Revises: 7c1f4e2a9b3d
+Create Date: 2026-10-15 22:20:05.412873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84d0e6c25f1'
+down_revision: Union[str, None] = '7c1f4e2a9b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_locations_trip_id_order',
+        'locations',
+        ['trip_id', 'order'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_locations_trip_id_order', table_name='locations')
@@ -1,47 +1,79 @@
-from pydantic_settings import BaseSettings
-from pydantic import Field
-from typing import Optional
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Mapping, Optional
 
+from dotenv import load_dotenv
 
-class AppConfig(BaseSettings):
-    """Application configuration from environment variables."""
+# Values from the environment take precedence over the .env file
+load_dotenv(".env")
+
+
+def _env_bool(value: str) -> bool:
+    """Parse a boolean environment value."""
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_set(value: str) -> frozenset:
+    """Parse a comma-separated environment value."""
+    return frozenset(item.strip() for item in value.split(",") if item.strip())
+
+
+@dataclass(slots=True, frozen=True)
+class AppConfig:
+    """Application configuration from environment variables.
+
+    Each field is read from the upper-case environment variable of the
+    same name, falling back to the ``.env`` file.
+    """
 
     # Database
-    database_url: str = Field(
-        default="sqlite:///./locations.db",
-        json_schema_extra={"env": "DATABASE_URL"},
-    )
+    database_url: str
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_recycle: int
 
     # Security
-    secret_key: str = Field(
-        default="your-secret-key-here", json_schema_extra={"env": "SECRET_KEY"}
-    )
+    secret_key: str
 
     # Application
-    app_name: str = Field(
-        default="Locations API", json_schema_extra={"env": "APP_NAME"}
-    )
-    app_version: str = Field(
-        default="0.1.0", json_schema_extra={"env": "APP_VERSION"}
-    )
-    debug: bool = Field(default=False, json_schema_extra={"env": "DEBUG"})
+    app_name: str
+    app_version: str
+    debug: bool
+    # Paths served without request logging (health probes, docs)
+    bypass_log_paths: frozenset
 
     # OpenAI API
-    openai_api_key: Optional[str] = Field(
-        default=None, json_schema_extra={"env": "OPENAI_API_KEY"}
-    )
-    openai_model: str = Field(
-        default="gpt-3.5-turbo-1106", json_schema_extra={"env": "OPENAI_MODEL"}
-    )
+    openai_api_key: Optional[str]
+    openai_model: str
 
     # Server
-    host: str = Field(default="0.0.0.0", json_schema_extra={"env": "HOST"})
-    port: int = Field(default=8000, json_schema_extra={"env": "PORT"})
+    host: str
+    port: int
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] = os.environ) -> "AppConfig":
+        """Build the configuration from environment variables."""
+        return cls(
+            database_url=env.get("DATABASE_URL", "sqlite:///./locations.db"),
+            db_pool_size=int(env.get("DB_POOL_SIZE", "20")),
+            db_max_overflow=int(env.get("DB_MAX_OVERFLOW", "10")),
+            db_pool_recycle=int(env.get("DB_POOL_RECYCLE", "1800")),
+            secret_key=env.get("SECRET_KEY", "your-secret-key-here"),
+            app_name=env.get("APP_NAME", "Locations API"),
+            app_version=env.get("APP_VERSION", "0.1.0"),
+            debug=_env_bool(env.get("DEBUG", "false")),
+            bypass_log_paths=_env_set(
+                env.get("BYPASS_LOG_PATHS", "/health,/,/docs,/openapi.json,/redoc")
+            ),
+            openai_api_key=env.get("OPENAI_API_KEY"),
+            openai_model=env.get("OPENAI_MODEL", "gpt-3.5-turbo-1106"),
+            host=env.get("HOST", "0.0.0.0"),
+            port=int(env.get("PORT", "8000")),
+        )
 
 
-# Global configuration instance
-config = AppConfig()
+@lru_cache(maxsize=1)
+def get_config() -> AppConfig:
+    """Return the application configuration, parsed once per process."""
+    return AppConfig.from_env()
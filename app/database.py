@@ -1,15 +1,38 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
-from typing import Generator
-from app.config import config
+from sqlalchemy.pool import StaticPool
+from typing import Any, Dict, Generator
+from app.config import get_config
+
+config = get_config()
+
+
+def _engine_options(database_url: str) -> Dict[str, Any]:
+    """Connection pool options for the configured database."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        options: Dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+        # An in-memory database only lives as long as its connection
+        if url.database in (None, "", ":memory:"):
+            options["poolclass"] = StaticPool
+        return options
+
+    # Keep warm connections for concurrent requests instead of
+    # reconnecting once the default pool of 5 is exhausted
+    options = {
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_pre_ping": True,
+        "pool_recycle": config.db_pool_recycle,
+    }
+    # Batch executemany for statements without RETURNING too
+    if url.get_dialect().driver == "psycopg2":
+        options["executemany_mode"] = "values_plus_batch"
+    return options
+
 
 # Create database engine
-engine = create_engine(
-    config.database_url,
-    connect_args={"check_same_thread": False}
-    if "sqlite" in config.database_url
-    else {},
-)
+engine = create_engine(config.database_url, **_engine_options(config.database_url))
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
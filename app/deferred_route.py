@@ -0,0 +1,33 @@
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+
+
+class DeferredAPIRoute(APIRoute):
+    """APIRoute that postpones its setup until the route is first used.
+
+    APIRoute.__init__ analyses the endpoint signature and clones the
+    response fields, and ``include_router`` does it again for every
+    copied route. This route only keeps the constructor arguments, which
+    is all ``include_router`` reads, and runs the real initialisation the
+    first time another attribute (``path_regex``, ``dependant``,
+    ``response_field``, ...) is needed, i.e. on the first matching
+    request or when the OpenAPI schema is built.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        self.__dict__["_deferred_init"] = (path, endpoint, kwargs)
+        self.path = path
+        self.endpoint = endpoint
+        self.__dict__.update(kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes that are not set yet
+        deferred = self.__dict__.pop("_deferred_init", None)
+        if deferred is None:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        path, endpoint, kwargs = deferred
+        super().__init__(path, endpoint, **kwargs)
+        return getattr(self, name)
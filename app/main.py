@@ -1,11 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.config import config
+from fastapi.responses import ORJSONResponse
+from app.config import get_config
 from app.routes import router, requests_router
-from app.middleware import RequestLoggingMiddleware
+from app.middleware import (
+    LOG_QUEUE_MAXSIZE,
+    RequestLoggingMiddleware,
+    drain_request_logs,
+)
 from app.database import engine, Base
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import logging
 
+config = get_config()
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
@@ -20,12 +29,26 @@ if config.debug:
 else:
     logging.getLogger("uvicorn").setLevel(logging.INFO)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background writer for the request log queue."""
+    app.state.log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+    drain_task = asyncio.create_task(drain_request_logs(app.state.log_queue))
+    yield
+    drain_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await drain_task
+
+
 # Create FastAPI app
 app = FastAPI(
     title=config.app_name,
     version=config.app_version,
     description="Application for managing geo-locations with request tracking",
     debug=config.debug,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
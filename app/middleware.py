@@ -1,73 +1,192 @@
+import asyncio
+import itertools
 import logging
 import time
+from datetime import datetime, timezone
+from typing import List
 
 from fastapi import HTTPException, Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import URL
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.config import get_config
 from app.database import SessionLocal
 from app.schemas import RequestCreate
 from app.services import RequestService
 
 logger = logging.getLogger(__name__)
+_log_info = logger.info
 
+# Maximum number of queued requests written in a single INSERT
+LOG_BATCH_SIZE = 128
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+# Requests waiting to be stored; further requests are dropped (and logged)
+# while the queue is full, e.g. when the database stalls
+LOG_QUEUE_MAXSIZE = 10_000
+
+# Per-process id used to correlate log records of the same request
+_request_ids = itertools.count(1)
+
+# Request headers stored with the request: ASGI (lower-case) name -> label
+_WANTED_HEADERS = {
+    b"user-agent": "User-Agent",
+    b"accept": "Accept",
+    b"content-type": "Content-Type",
+    b"host": "Host",
+}
+
+
+def _write_request_logs(batch: List[dict]) -> None:
+    """Persist a batch of queued requests."""
+    with SessionLocal() as db:
+        RequestService(db).bulk_create_requests(batch)
+
+
+async def drain_request_logs(queue: asyncio.Queue) -> None:
+    """
+    Background task that stores queued requests in the database.
+    Whatever is already queued is written together, up to LOG_BATCH_SIZE
+    rows per INSERT, off the event loop thread.
+    """
+    try:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < LOG_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await asyncio.to_thread(_write_request_logs, batch)
+            except Exception as exc:
+                logger.error(
+                    "Failed to store %d requests: %s",
+                    len(batch),
+                    str(exc),
+                    exc_info=True,
+                )
+    except asyncio.CancelledError:
+        # Flush what is left on shutdown
+        batch = []
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch:
+            try:
+                _write_request_logs(batch)
+            except Exception as exc:
+                # Must not replace the cancellation, or shutdown fails
+                logger.error(
+                    "Failed to store %d requests on shutdown: %s",
+                    len(batch),
+                    str(exc),
+                    exc_info=True,
+                )
+        raise
+
+
+def _queue_request_log(scope: Scope, request_data: RequestCreate) -> None:
+    """Queue request data for drain_request_logs, dropping it if impossible."""
+    # Missing when the app's lifespan did not run (lifespan off, mounted app)
+    queue = getattr(scope["app"].state, "log_queue", None)
+    if queue is None:
+        logger.warning("Request log queue is not running, request not stored")
+        return
+    try:
+        queue.put_nowait(request_data.model_dump())
+    except asyncio.QueueFull:
+        logger.warning("Request log queue is full, request not stored")
+
+
+class RequestLoggingMiddleware:
     """
     A middleware that catches the app's exceptions,
     logs it, and re-raises exceptions.
-    Stores request data in the database
+    Queues request data for storage in the database
     and logs request and response details.
+
+    Implemented as a pure ASGI middleware so that no intermediate
+    request/response wrappers are allocated per request. Paths listed in
+    the ``bypass_log_paths`` setting (health probes, docs) are passed
+    through untouched.
+
+    The request data is exposed to the endpoints as
+    ``request.state.request_data``. Endpoints may replace it with a
+    ``RequestCreate`` carrying more details (e.g. the body). Endpoints that
+    need the request row right away store it themselves and replace
+    ``request_data`` with the saved model; otherwise it is queued for
+    ``drain_request_logs``.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        db = SessionLocal()
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.bypass_paths = get_config().bypass_log_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.bypass_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request_id = next(_request_ids)
 
-        req_service = RequestService(db)
+        headers = dict.fromkeys(_WANTED_HEADERS.values(), "")
+        for name, value in scope["headers"]:
+            label = _WANTED_HEADERS.get(name)
+            if label is not None:
+                headers[label] = value.decode("latin-1")
 
         request_data = RequestCreate(
-            method=request.method,
-            url=str(request.url),
-            headers=self.obtain_necessary_headers(request),
-        )
-        saved_req = req_service.create_request(request_data)
-        request.state.request_data = saved_req
-
-        response = None
-        logger.info(
-            "Processing request %s %s",
-            request.client.host,
-            request.url.path,
+            method=scope["method"],
+            url=str(URL(scope=scope)),
+            headers=headers,
+            # Stored with the row, which is written after the response
+            created_at=datetime.now(timezone.utc),
         )
+        state = scope.setdefault("state", {})
+        state["request_data"] = request_data
+        state["request_id"] = request_id
+
+        status_code = None
+        # Checked once per request; skips building log arguments when disabled
+        info_enabled = logger.isEnabledFor(logging.INFO)
+        if info_enabled:
+            client = scope.get("client")
+            _log_info(
+                "Processing request %s %s",
+                client[0] if client else None,
+                scope["path"],
+            )
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_wrapper)
 
-            if response.status_code >= 400:
-                if response.status_code >= 500:
+            if status_code is not None and status_code >= 400:
+                if status_code >= 500:
                     logger.critical(
                         "Server error response status_code: %s",
-                        response.status_code,
+                        status_code,
                     )
                 else:
                     logger.warning(
                         "Error response %s",
-                        response.status_code,
-                        extra={"request_id": saved_req.id},
+                        status_code,
+                        extra={"request_id": request_id},
                     )
-            else:
-                logger.info(
+            elif info_enabled:
+                _log_info(
                     "Request completed %s",
-                    response.status_code,
-                    extra={"request_id": saved_req.id},
+                    status_code,
+                    extra={"request_id": request_id},
                 )
-            return response
         except HTTPException as exc:
             logger.error(
                 "HTTP Exception occurred %s",
                 exc.detail,
                 extra={
-                    "request_id": saved_req.id,
+                    "request_id": request_id,
                 },
             )
             raise exc
@@ -76,30 +195,21 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 "Unhandled exception occurred %s",
                 str(exc),
                 extra={
-                    "request_id": saved_req.id,
+                    "request_id": request_id,
                 },
             )
             raise exc
         finally:
-            elapsed_time = time.time() - start_time
-            logger.info(
-                "Request processed in %.2f seconds",
-                elapsed_time,
-                extra={"request_id": saved_req.id},
-            )
-            req_service.update_request(saved_req, request_data)
-            db.close()
-
-    def obtain_necessary_headers(self, request: Request) -> dict:
-        """
-        Extract necessary headers from the request.
-        """
-        return {
-            "User-Agent": request.headers.get("User-Agent", ""),
-            "Accept": request.headers.get("Accept", ""),
-            "Content-Type": request.headers.get("Content-Type", ""),
-            "Host": request.headers.get("Host", ""),
-        }
+            if info_enabled:
+                _log_info(
+                    "Request processed in %.2f seconds",
+                    time.perf_counter() - start_time,
+                    extra={"request_id": request_id},
+                )
+            # Still a RequestCreate unless the endpoint stored the request
+            pending = state.get("request_data")
+            if isinstance(pending, RequestCreate):
+                _queue_request_log(scope, pending)
 
     def get_user_location(self, request: Request) -> str:
         """
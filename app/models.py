@@ -1,4 +1,14 @@
-from sqlalchemy import String, Float, DateTime, Text, func, JSON, Integer, ForeignKey
+from sqlalchemy import (
+    String,
+    Float,
+    DateTime,
+    Text,
+    func,
+    JSON,
+    Integer,
+    ForeignKey,
+    Index,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional
@@ -97,3 +107,13 @@ class Location(Base):
 
     def __repr__(self) -> str:
         return f"<Location(id={self.id}, name='{self.name}')>"
+
+
+# Indexes for the hot read paths:
+# - request history ordered by created_at DESC with a LIMIT
+# - trip lookup by request id (a request produces at most one trip)
+# - locations of a trip ordered by "order" (ascending B-tree indexes keep
+#   NULLs last on PostgreSQL, matching ORDER BY "order" ASC NULLS LAST)
+Index("ix_requests_created_at_desc", Request.created_at.desc())
+Index("ix_trips_request_id", Trip.request_id, unique=True)
+Index("ix_locations_trip_id_order", Location.trip_id, Location.order)
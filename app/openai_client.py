@@ -1,17 +1,24 @@
-import json
 import asyncio
 import logging
+from functools import lru_cache
 from typing import Dict, List, Optional
 
-from openai import Timeout, APIConnectionError
+import httpx
+import orjson
+from openai import Timeout, APIConnectionError, DefaultAsyncHttpxClient
 from openai import AsyncOpenAI, APIError, AuthenticationError, RateLimitError
 
+from app.config import get_config
 from app.models import Trip
 from app.schemas import TripCreateRequest, TripTypeEnum
 from app.trip_prompts import TRIP_PROMPT_SEVERAL_PLACES, TRIP_PROMPT_SINGLE_PLACE
 
 logger = logging.getLogger(__name__)
 
+# Settings used on every prediction, resolved once at import
+OPENAI_API_KEY = get_config().openai_api_key
+OPENAI_MODEL = get_config().openai_model
+
 
 class ChatGPTError(Exception):
     """Custom exception for ChatGPT errors."""
@@ -24,24 +31,46 @@ TRIP_TYPE = {
     TripTypeEnum.by_place: TRIP_PROMPT_SINGLE_PLACE,
 }
 
+# System messages are the same for every request of a trip type
+SYSTEM_MESSAGES = {
+    trip_type: {"role": "system", "content": prompt}
+    for trip_type, prompt in TRIP_TYPE.items()
+}
+
+
+def get_system_message(trip_type: str) -> Dict[str, str]:
+    """Return the system message for a trip type."""
+    return SYSTEM_MESSAGES.get(
+        trip_type, SYSTEM_MESSAGES[TripTypeEnum.several_places]
+    )
+
+
+@lru_cache(maxsize=None)
+def get_openai_client(api_key: Optional[str]) -> AsyncOpenAI:
+    """
+    Return the AsyncOpenAI client shared by every request using this key,
+    so HTTPS connections to the API are kept alive between requests.
+    SDK retries are disabled; get_completions_create_response retries itself.
+    """
+    return AsyncOpenAI(
+        api_key=api_key,
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+        ),
+    )
+
 
 class OpenAIChatClientBase:
     def __init__(
         self,
         api_key: str,
         model: str = "gpt-3.5-turbo-1106",
-        trip_type: str = "several_places",
     ):
         logger.info("Initializing OpenAI client...")
         self.model = model
-        self.client = AsyncOpenAI(api_key=api_key)
-        self.messages = []
+        self.client = get_openai_client(api_key)
         logger.info("OpenAI client initialized with model: %s", self.model)
-        self.system_prompt = TRIP_TYPE.get(trip_type, TRIP_PROMPT_SEVERAL_PLACES)
-
-    def add_message(self, role: str, content: str):
-        """Add a message to the chat history."""
-        self.messages.append({"role": role, "content": content})
 
     async def test_credentials(self) -> bool:
         """Test if the OpenAI API credentials are valid."""
@@ -73,156 +102,166 @@ class OpenAIChatClientBase:
             return False
 
 
-class OpenAIChatClientTrip(OpenAIChatClientBase):
-    def __init__(self, *args, **kwargs):  # noqa: E501
-        super().__init__(*args, **kwargs)
-        self.add_message("system", self.system_prompt)
-
-    async def get_completions_create_response(
-        self, num_places: Optional[int]
-    ) -> Optional[str]:
-        """Get a response from OpenAI completions.create with retry support.
-        Returns None if all retries fail.
-        """
-        max_retries = 4
-        backoff_base = 1
-        max_wait = 8
-
-        for attempt in range(max_retries):
-            try:
-                logger.debug(
-                    "Attempt %d: Starting OpenAI completions.create",
-                    attempt,
-                )
-                completion = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=self.messages,
-                    response_format={"type": "json_object"},
-                    temperature=0.7,
-                )
-                logger.debug("OpenAI response received")
-                result = completion.choices[0].message.content
-                if num_places and len(result) < num_places:
-                    logger.warning(
-                        "Received response with fewer locations than requested: %d < %d",
-                        len(result),
-                        num_places,
-                    )
-                    await asyncio.sleep(wait_time)
-                else:
-                    logger.debug("OpenAI response content: %s", result)
-                    return result
-
-            except (RateLimitError, Timeout, APIConnectionError, APIError) as e:
-                wait_time = min(backoff_base * (2**attempt), max_wait)
+async def get_completions_create_response(
+    client: AsyncOpenAI,
+    model: str,
+    messages: List[Dict],
+    num_places: Optional[int] = None,
+) -> Optional[str]:
+    """Get a response from OpenAI completions.create with retry support.
+    Returns None if all retries fail.
+    """
+    max_retries = 4
+    backoff_base = 1
+    max_wait = 8
+
+    for attempt in range(max_retries):
+        wait_time = min(backoff_base * (2**attempt), max_wait)
+        try:
+            logger.debug(
+                "Attempt %d: Starting OpenAI completions.create",
+                attempt,
+            )
+            completion = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                temperature=0.7,
+            )
+            logger.debug("OpenAI response received")
+            result = completion.choices[0].message.content
+            if num_places and len(result) < num_places:
                 logger.warning(
-                    "OpenAI request failed with %s (attempt %d/%d). Retrying in %s seconds...",  # noqa: E501
-                    type(e).__name__,
-                    attempt + 1,
-                    max_retries,
-                    wait_time,
-                    exc_info=True,
+                    "Received response with fewer locations than requested: %d < %d",
+                    len(result),
+                    num_places,
                 )
                 await asyncio.sleep(wait_time)
-            except ChatGPTError as e:
-                logger.error(
-                    "Unexpected error in get_completions_create_response: %s",
-                    str(e),
-                    exc_info=True,
-                )
-                return None
-
-        logger.error("All retries failed. Could not get OpenAI completion response.")
-        return None
+            else:
+                logger.debug("OpenAI response content: %s", result)
+                return result
 
-    async def get_trip_prediction(
-        self,
-        trip: TripCreateRequest,
-        trip_type: TripTypeEnum = TripTypeEnum.several_places,
-    ) -> List[Optional[Dict]]:
-        """Get trip prediction based on the text."""
-        try:
-            logger.debug("Starting trip prediction for text: %s", trip.request_text)
-            req_text = f"Generate location details for: {trip.request_text}"
-            if trip.start_location:
-                req_text += f" {trip.start_location}"
-            if trip.num_places and not trip_type == TripTypeEnum.several_places:
-                req_text += f", num_places = {trip.num_places}"
-            req_text += ". Return a list of all locations in the order they should be visited."  # noqa: E501
-
-            self.add_message("user", req_text)
-            logger.debug("Messages to send: %s", self.messages)
-
-            response_text = await self.get_completions_create_response(
-                num_places=trip.num_places
+        except (RateLimitError, Timeout, APIConnectionError, APIError) as e:
+            logger.warning(
+                "OpenAI request failed with %s (attempt %d/%d). Retrying in %s seconds...",  # noqa: E501
+                type(e).__name__,
+                attempt + 1,
+                max_retries,
+                wait_time,
+                exc_info=True,
             )
-            logger.debug("Raw OpenAI response: %s", response_text)
-
-            return self.parse_response(response_text)
-
+            await asyncio.sleep(wait_time)
         except ChatGPTError as e:
-            logger.error("Error in get_trip_prediction: %s", str(e), exc_info=True)
-            return []
-        finally:
-            # Clear the user message for the next request
-            if len(self.messages) > 1:
-                self.messages.pop()
-
-    def parse_response(self, response_text: str) -> List[Optional[Dict]]:
-        """Parse the OpenAI response text into a list of locations."""
-        # Parse the JSON response
-        try:
-            locations = json.loads(response_text)
-            if isinstance(locations, dict) and "locations" in locations:
-                locations = locations["locations"]
-            if isinstance(locations, dict):
-                locations = [locations]
-            logger.info("Generated %s locations after exclusion", len(locations))
-            logger.debug("Processed locations after exclusion: %s", locations)
-            return locations
-        except json.JSONDecodeError as e:
-            logger.error("Failed to parse JSON response: %s", e)
-            return []
-
-    async def get_exlude_locations_prediction(
-        self, previous_trip: Trip, exclude_text: str
-    ) -> List[Optional[Dict]]:
-        """Get trip prediction excluding specific locations."""
-        try:
-            logger.debug(
-                "Starting exclusion prediction for text: %s, excluding: %s",
-                previous_trip.response_json,
-                exclude_text,
+            logger.error(
+                "Unexpected error in get_completions_create_response: %s",
+                str(e),
+                exc_info=True,
             )
-            self.add_message(
-                "user", f"Previous generated trip was: {previous_trip.response_json}"
-            )  # noqa: E501
+            return None
 
-            self.add_message("user", f"Exclude text: {exclude_text}")
-            num_places_text = ""
-            if (
-                previous_trip.num_places
-                and previous_trip.trip_type == TripTypeEnum.by_place
-            ):
-                num_places_text += f". num_places = {previous_trip.num_places}"
-            num_places_text += ". Return a list of all locations in the order they should be visited."  # noqa: E501
-            self.add_message("user", num_places_text)
+    logger.error("All retries failed. Could not get OpenAI completion response.")
+    return None
 
-            logger.debug("Messages to send: %s", self.messages)
 
-            response_text = await self.get_completions_create_response()
-            logger.debug("Raw OpenAI response: %s", response_text)
+async def predict_trip(
+    trip: TripCreateRequest,
+    trip_type: TripTypeEnum = TripTypeEnum.several_places,
+    client: Optional[AsyncOpenAI] = None,
+    model: str = OPENAI_MODEL,
+) -> List[Optional[Dict]]:
+    """Get trip prediction based on the text."""
+    try:
+        logger.debug("Starting trip prediction for text: %s", trip.request_text)
+        req_text = f"Generate location details for: {trip.request_text}"
+        if trip.start_location:
+            req_text += f" {trip.start_location}"
+        if trip.num_places and not trip_type == TripTypeEnum.several_places:
+            req_text += f", num_places = {trip.num_places}"
+        req_text += ". Return a list of all locations in the order they should be visited."  # noqa: E501
 
-            return self.parse_response(response_text)
+        messages = [
+            get_system_message(trip_type),
+            {"role": "user", "content": req_text},
+        ]
+        logger.debug("Messages to send: %s", messages)
 
-        except ChatGPTError as e:
-            logger.error(
-                "Error in get_exlude_locations_prediction: %s",
-                str(e),
-                exc_info=True,  # noqa: E501
-            )
-            return []
-        finally:
-            if len(self.messages) > 2:
-                self.messages.pop()
-                self.messages.pop()
+        response_text = await get_completions_create_response(
+            client or get_openai_client(OPENAI_API_KEY),
+            model,
+            messages,
+            num_places=trip.num_places,
+        )
+        logger.debug("Raw OpenAI response: %s", response_text)
+
+        return parse_response(response_text)
+
+    except ChatGPTError as e:
+        logger.error("Error in predict_trip: %s", str(e), exc_info=True)
+        return []
+
+
+async def predict_trip_excluding(
+    previous_trip: Trip,
+    exclude_text: str,
+    client: Optional[AsyncOpenAI] = None,
+    model: str = OPENAI_MODEL,
+) -> List[Optional[Dict]]:
+    """Get trip prediction excluding specific locations."""
+    try:
+        logger.debug(
+            "Starting exclusion prediction for text: %s, excluding: %s",
+            previous_trip.response_json,
+            exclude_text,
+        )
+        num_places_text = ""
+        if (
+            previous_trip.num_places
+            and previous_trip.trip_type == TripTypeEnum.by_place
+        ):
+            num_places_text += f". num_places = {previous_trip.num_places}"
+        num_places_text += ". Return a list of all locations in the order they should be visited."  # noqa: E501
+
+        messages = [
+            get_system_message(previous_trip.trip_type),
+            {
+                "role": "user",
+                "content": f"Previous generated trip was: {previous_trip.response_json}",  # noqa: E501
+            },
+            {"role": "user", "content": f"Exclude text: {exclude_text}"},
+            {"role": "user", "content": num_places_text},
+        ]
+        logger.debug("Messages to send: %s", messages)
+
+        response_text = await get_completions_create_response(
+            client or get_openai_client(OPENAI_API_KEY),
+            model,
+            messages,
+        )
+        logger.debug("Raw OpenAI response: %s", response_text)
+
+        return parse_response(response_text)
+
+    except ChatGPTError as e:
+        logger.error(
+            "Error in predict_trip_excluding: %s",
+            str(e),
+            exc_info=True,  # noqa: E501
+        )
+        return []
+
+
+def parse_response(response_text: str) -> List[Optional[Dict]]:
+    """Parse the OpenAI response text into a list of locations."""
+    # Parse the JSON response
+    try:
+        locations = orjson.loads(response_text)
+        if isinstance(locations, dict) and "locations" in locations:
+            locations = locations["locations"]
+        if isinstance(locations, dict):
+            locations = [locations]
+        logger.info("Generated %s locations after exclusion", len(locations))
+        logger.debug("Processed locations after exclusion: %s", locations)
+        return locations
+    except orjson.JSONDecodeError as e:
+        logger.error("Failed to parse JSON response: %s", e)
+        return []
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, Query, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 import logging
 
-from app.config import config
 from app.database import get_db
+from app.deferred_route import DeferredAPIRoute
 from app.map_gen import generate_full_map_html
 from app.services import RequestService, TripService, LocationService
 from app.schemas import (
@@ -17,13 +20,20 @@ from app.schemas import (
     TripTypeEnum,
 )
 from app.models import Request as App_Request
-from app.openai_client import OpenAIChatClientTrip
+from app.openai_client import predict_trip, predict_trip_excluding
 from app.utils import validate_prediction_locations, validate_trip_response
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/trip", tags=["trips"])
-requests_router = APIRouter(prefix="/requests", tags=["requests"])
+# Validators for response lists, built once and reused for every request
+_TripListAdapter = TypeAdapter(list[TripResponse])
+_ReqListAdapter = TypeAdapter(list[RequestResponse])
+_LocListAdapter = TypeAdapter(list[LocationResponse])
+
+router = APIRouter(prefix="/trip", tags=["trips"], route_class=DeferredAPIRoute)
+requests_router = APIRouter(
+    prefix="/requests", tags=["requests"], route_class=DeferredAPIRoute
+)
 
 
 @router.post("/", response_model=TripResponse, status_code=201)
@@ -39,62 +49,56 @@ async def create_trip(
     req_service = RequestService(db)
 
     logger.info("Creating trip with data: %s", trip_data)
-    chat_trip = OpenAIChatClientTrip(
-        api_key=config.openai_api_key,
-        model=config.openai_model,
-        trip_type=trip_type.value,
-    )
+    prediction_locations_list = await predict_trip(trip_data, trip_type)
 
-    prediction_locations_list = await chat_trip.get_trip_prediction(
-        trip_data, trip_type
+    # Add the body to the request data; the logging middleware queues it
+    # unless the endpoint stores the request itself
+    pending_request: RequestCreate = request.state.request_data
+    request_create = pending_request.model_copy(
+        update={"body": trip_data.model_dump()}
     )
+    request.state.request_data = request_create
 
-    # Get request data after body parsing
-    request_data: App_Request = request.state.request_data
-    request_data = req_service.update_request(
-        req_service.get_request(request_data.id),
-        RequestCreate(
-            method=request_data.method,
-            url=request_data.url,
-            headers=request_data.headers,
-            body=trip_data.model_dump(),
-        ),
+    # The several places prompt already returns the locations in travel order
+    locations_list = validate_prediction_locations(
+        prediction_locations_list,
+        skip_reorder=trip_type == TripTypeEnum.several_places,
     )
 
-    locations_list = validate_prediction_locations(prediction_locations_list)
-
-    # Create trip and locations
-    trip = trip_service.create_trip(
-        TripCreate(
-            request_id=request_data.id,
-            parent_id=None,
-            response_json=prediction_locations_list,
-            num_places=len(prediction_locations_list),
-            trip_type=trip_type.value,
+    # Create request, trip and locations in a single transaction
+    with trip_service.unit_of_work():
+        request_data: App_Request = req_service.create_request(request_create)
+        trip = trip_service.create_trip(
+            TripCreate(
+                request_id=request_data.id,
+                parent_id=None,
+                response_json=prediction_locations_list,
+                num_places=len(prediction_locations_list),
+                trip_type=trip_type.value,
+            )
         )
-    )
+        trip_id = trip.id
 
-    locations = locations_service.create_locations_for_trip(
-        trip_id=trip.id, locations_data=locations_list
-    )
+        locations_service.create_locations_for_trip(
+            trip_id=trip_id, locations_data=locations_list
+        )
+    request.state.request_data = request_data
 
-    # Refresh both trip and locations
-    db.refresh(trip)
-    for location in locations:
-        db.refresh(location)
-
-    # Explicitly query the trip with locations to ensure relationship is loaded
-    trip = trip_service.get_trip(trip.id)
-    logger.debug("Trip before validation: %s", trip.__dict__)
-    logger.debug(
-        "Trip locations: %s",
-        [loc.__dict__ for loc in trip.locations],
-    )
+    # Query the trip with its locations and request eagerly loaded
+    trip = trip_service.get_trip(trip_id)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Trip before validation: %s", trip.__dict__)
+        logger.debug(
+            "Trip locations: %s",
+            [loc.__dict__ for loc in trip.locations],
+        )
 
     return validate_trip_response(
         trip=trip,
         request_data=request_data,
-        locations=[LocationResponse.model_validate(loc) for loc in trip.locations],
+        locations=_LocListAdapter.validate_python(
+            trip.locations, from_attributes=True
+        ),
     )
 
 
@@ -117,64 +121,59 @@ async def exclude_locations_from_trip(
         )
 
     # Get request data from previous trip
-    chat_trip = OpenAIChatClientTrip(
-        api_key=config.openai_api_key,
-        model=config.openai_model,
-        trip_type=previous_trip.trip_type,
-    )
-    prediction_locations_list = await chat_trip.get_exlude_locations_prediction(
+    prediction_locations_list = await predict_trip_excluding(
         previous_trip,
         trip_data.exclude_text,
     )
-    current_request_data: App_Request = request.state.request_data
-    current_request_data = req_service.update_request(
-        req_service.get_request(current_request_data.id),
-        RequestCreate(
-            method=current_request_data.method,
-            url=current_request_data.url,
-            headers=current_request_data.headers,
-            body=trip_data.model_dump(),
-        ),
+    pending_request: RequestCreate = request.state.request_data
+    request_create = pending_request.model_copy(
+        update={"body": trip_data.model_dump()}
     )
+    request.state.request_data = request_create
 
-    locations_list = validate_prediction_locations(prediction_locations_list)
-    # Create trip and locations
-    trip = trip_service.create_trip(
-        TripCreate(
-            request_id=current_request_data.id,
-            parent_id=previous_trip.id,
-            response_json=prediction_locations_list,
-            num_places=len(prediction_locations_list),
-            trip_type=previous_trip.trip_type,
-        )
+    locations_list = validate_prediction_locations(
+        prediction_locations_list,
+        skip_reorder=previous_trip.trip_type == TripTypeEnum.several_places,
     )
 
-    locations = locations_service.create_locations_for_trip(
-        trip_id=trip.id, locations_data=locations_list
-    )
+    # Create request, trip and locations in a single transaction
+    with trip_service.unit_of_work():
+        current_request_data: App_Request = req_service.create_request(
+            request_create
+        )
+        trip = trip_service.create_trip(
+            TripCreate(
+                request_id=current_request_data.id,
+                parent_id=previous_trip.id,
+                response_json=prediction_locations_list,
+                num_places=len(prediction_locations_list),
+                trip_type=previous_trip.trip_type,
+            )
+        )
+        trip_id = trip.id
 
-    # Refresh both trip and locations
-    db.refresh(trip)
-    for location in locations:
-        db.refresh(location)
+        locations_service.create_locations_for_trip(
+            trip_id=trip_id, locations_data=locations_list
+        )
+    request.state.request_data = current_request_data
 
-    # Explicitly query the trip with locations to ensure relationship is loaded
-    trip = trip_service.get_trip(trip.id)
-    logger.debug(
-        "Trip locations: %s",
-        [loc.__dict__ for loc in trip.locations],
-    )
+    # Query the trip with its locations and request eagerly loaded
+    trip = trip_service.get_trip(trip_id)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Trip locations: %s",
+            [loc.__dict__ for loc in trip.locations],
+        )
 
     return validate_trip_response(
         trip=trip,
         request_data=current_request_data,
-        locations=[LocationResponse.model_validate(loc) for loc in trip.locations],
+        locations=_LocListAdapter.validate_python(
+            trip.locations, from_attributes=True
+        ),
     )
 
 
-from fastapi.responses import HTMLResponse
-
-
 @router.get("/{trip_id}/mapHTML", response_class=HTMLResponse)
 async def generate_html_from_map(trip_id: int, db: Session = Depends(get_db)):
     """Return standalone HTML map document."""
@@ -189,9 +188,10 @@ async def generate_html_from_map(trip_id: int, db: Session = Depends(get_db)):
     locations_data = [
         (loc.latitude, loc.longitude, loc.description) for loc in trip.locations
     ]
-    html_content = generate_full_map_html(locations_data)
-
-    return HTMLResponse(content=html_content, status_code=200)
+    # Built off the event loop, before the response starts, so errors
+    # still produce a 500
+    html = await run_in_threadpool(generate_full_map_html, locations_data)
+    return HTMLResponse(html)
 
 
 # Requests Routes
@@ -202,7 +202,7 @@ async def get_trips(db: Session = Depends(get_db), limit: int = 100):
     """Get a list of trips."""
     trip_service = TripService(db)
     trips = trip_service.get_trips(limit=limit)
-    return [TripResponse.model_validate(trip) for trip in trips]
+    return _TripListAdapter.validate_python(trips, from_attributes=True)
 
 
 @requests_router.get("/", response_model=list[RequestResponse])
@@ -214,5 +214,7 @@ async def get_requests(
 ):
     """Get a list of requests (History)."""
     req_service = RequestService(db)
-    requests = req_service.get_requests(limit=limit, order=order, only_trips=only_trips)
-    return [RequestResponse.model_validate(req) for req in requests]
+    requests = req_service.get_requests_iter(
+        limit=limit, order=order, only_trips=only_trips
+    )
+    return _ReqListAdapter.validate_python(requests, from_attributes=True)
@@ -1,7 +1,7 @@
 from enum import Enum
 from pydantic import BaseModel, Field, ConfigDict
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Literal
 
 
 class TripTypeEnum(str, Enum):
@@ -11,6 +11,10 @@ class TripTypeEnum(str, Enum):
     by_place = "by_place"
 
 
+# Trip type as stored on trips; validated as a plain string literal
+TripTypeLiteral = Literal["several_places", "by_place"]
+
+
 # Request schemas
 class RequestCreate(BaseModel):
     """Schema for creating a new request."""
@@ -19,13 +23,8 @@ class RequestCreate(BaseModel):
     url: str = Field(..., max_length=255)
     headers: Optional[Dict[str, Any]] = Field(None)
     body: Optional[Dict[str, Any]] = Field(None)
-
-    # validate body to have the "text" key
-    def validate_body(self):
-        if self.body and not isinstance(self.body, dict):
-            raise ValueError("Body must be a dictionary.")
-        if self.body and "text" not in self.body:
-            raise ValueError("Body must contain a 'text' key.")
+    # Arrival time; the row itself may be written later
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -34,7 +33,7 @@ class TripCreateRequest(BaseModel):
     """Schema for creating a new trip request."""
 
     request_text: str = Field(
-        str,
+        ...,
         min_length=1,
         max_length=1000,
         examples=[
@@ -42,7 +41,7 @@ class TripCreateRequest(BaseModel):
             "Plan a trip to Golden Gate Bridge, Yosemite National Park, and Alcatraz Island.",
         ],
     )
-    start_location: str = Field(
+    start_location: Optional[str] = Field(
         None,
         min_length=1,
         max_length=100,
@@ -65,7 +64,7 @@ class ExcludeLocationsRequest(BaseModel):
     """Schema for excluding specific locations from a trip."""
 
     exclude_text: str = Field(
-        str,
+        ...,
         min_length=1,
         max_length=1000,
         examples=[
@@ -84,8 +83,8 @@ class TripCreate(BaseModel):
     parent_id: Optional[int] = Field(None)
     response_json: Optional[Dict[str, Any] | List[Dict[str, Any]]] = Field(None)
     num_places: Optional[int] = Field(None)
-    trip_type: TripTypeEnum = Field(
-        TripTypeEnum.several_places, description="Type of the trip."
+    trip_type: TripTypeLiteral = Field(
+        "several_places", description="Type of the trip."
     )
 
 
@@ -103,8 +102,7 @@ class LocationCreate(BaseModel):
     country: Optional[str] = Field(None, max_length=100)
     order: Optional[int] = Field(None)
 
-    class Config:
-        from_attributes = True  # Enable compatibility with SQLAlchemy models
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LocationResponse(BaseModel):
@@ -135,14 +133,11 @@ class TripResponse(BaseModel):
     num_places: Optional[int] = None
     created_at: datetime
     locations: Optional[List[LocationResponse]] = None
-    trip_type: TripTypeEnum = Field(
-        TripTypeEnum.several_places, description="Type of the trip."
+    trip_type: TripTypeLiteral = Field(
+        "several_places", description="Type of the trip."
     )
 
-    class Config:
-        """Configuration for TripResponse model."""
-
-        from_attributes = True  # use with SQLAlchemy models
+    model_config = ConfigDict(from_attributes=True)
 
 
 class RequestResponse(BaseModel):
@@ -1,53 +1,105 @@
-from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import select
+from pydantic import BaseModel
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+from sqlalchemy import exists, insert, select
 from app.models import Location, Request, Trip
 from app.schemas import (
     LocationCreate,
     RequestCreate,
     TripCreate,
 )
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+# Columns written by bulk_create_locations, resolved once
+_LOCATION_KEYS = tuple(LocationCreate.model_fields)
+
+# Requests fetched per batch when iterating over the request history
+REQUESTS_YIELD_PER = 100
+
+
+def _field_values(data: BaseModel) -> Dict[str, Any]:
+    """Top-level field values of a schema, without model_dump()'s deep copy."""
+    return {name: getattr(data, name) for name in type(data).model_fields}
 
-class RequestService:
-    """Service class for request operations."""
+
+class BaseService:
+    """Base class for services working on a database session."""
 
     def __init__(self, db: Session):
         self.db = db
 
+    @contextmanager
+    def unit_of_work(self) -> Iterator[Session]:
+        """Commit everything written inside the block at once.
+
+        The create_* methods only flush, so several of them (also from
+        different services sharing the session) end up in one transaction.
+        The transaction is rolled back if the block raises.
+        """
+        try:
+            yield self.db
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+
+class RequestService(BaseService):
+    """Service class for request operations."""
+
     def create_request(self, request_data: RequestCreate) -> Request:
-        """Create a new request."""
-        db_request = Request(**request_data.model_dump())
+        """Create a new request. Committed by the caller's unit_of_work()."""
+        db_request = Request(**_field_values(request_data))
         self.db.add(db_request)
-        self.db.commit()
-        self.db.refresh(db_request)
+        # id and created_at are fetched by the INSERT itself
+        self.db.flush()
         return db_request
 
+    def bulk_create_requests(self, requests_data: List[dict]) -> None:
+        """Insert a batch of request rows with a single executemany."""
+        self.db.execute(insert(Request), requests_data)
+        self.db.commit()
+
     def get_request(self, request_id: int) -> Optional[Request]:
-        """Get a request by ID."""
-        stmt = select(Request).where(Request.id == request_id)
-        return self.db.execute(stmt).scalar_one_or_none()
+        """Get a request by ID (from the identity map if already loaded)."""
+        return self.db.get(Request, request_id)
 
     def get_requests(
         self, limit: int = 100, order: str = "desc", only_trips=False
     ) -> List[Request]:
         """Get a list of requests with an optional limit.
 
+        See get_requests_iter for the arguments.
+        """
+        return list(
+            self.get_requests_iter(limit=limit, order=order, only_trips=only_trips)
+        )
+
+    def get_requests_iter(
+        self, limit: int = 100, order: str = "desc", only_trips=False
+    ) -> Iterator[Request]:
+        """Iterate over requests, fetching REQUESTS_YIELD_PER rows at a time.
+
         Args:
             limit: Maximum number of requests to return
             order: Sort order ('asc' or 'desc') by created_at
             only_trips: If True, return only requests that have associated trips
         """
-        stmt = select(Request)
+        # RequestResponse serializes the trip with its locations, so they are
+        # always loaded up front; any other lazy load raises instead of
+        # silently issuing a query per request
+        stmt = select(Request).options(
+            selectinload(Request.trip).selectinload(Trip.locations),
+            raiseload("*"),
+        )
 
         if only_trips:
-            stmt = stmt.join(Trip, Request.id == Trip.request_id)
-            stmt = stmt.options(selectinload(Request.trip).selectinload(Trip.locations))
-            stmt = stmt.distinct()
+            # Semi-join: no row per trip to deduplicate with DISTINCT
+            stmt = stmt.where(exists().where(Trip.request_id == Request.id))
 
         # Apply ordering
         stmt = stmt.order_by(
@@ -59,49 +111,48 @@ class RequestService:
         # Apply limit
         stmt = stmt.limit(limit)
 
-        # Execute the statement and return the results as a list
-        return list(self.db.execute(stmt).scalars().all())
-
-    def update_request(self, request: Request, response_data: RequestCreate) -> Request:
-        for field, value in response_data.model_dump().items():
-            setattr(request, field, value)
-        self.db.commit()
-        self.db.refresh(request)
-        return request
+        # Rows and their selectin-loaded trips are fetched batch by batch
+        stmt = stmt.execution_options(yield_per=REQUESTS_YIELD_PER)
+        yield from self.db.execute(stmt).scalars()
 
 
-class TripService:
+class TripService(BaseService):
     """Service class for trip operations."""
 
-    def __init__(self, db: Session):
-        self.db = db
-
     def create_trip(self, trip_data: TripCreate) -> Trip:
-        """Create a new trip."""
-        db_trip = Trip(**trip_data.model_dump())
+        """Create a new trip. Committed by the caller's unit_of_work()."""
+        db_trip = Trip(**_field_values(trip_data))
         self.db.add(db_trip)
-        self.db.commit()
-        self.db.refresh(db_trip)
+        self.db.flush()
         return db_trip
 
     def get_trip(self, trip_id: int) -> Optional[Trip]:
-        """Get a trip by ID."""
-        stmt = (
-            select(Trip)
-            .where(Trip.id == trip_id)
-            .options(selectinload(Trip.locations))  # Ensure locations are loaded
+        """Get a trip by ID with its locations and request."""
+        return self.db.get(
+            Trip,
+            trip_id,
+            # Load locations and the request with the trip, not lazily per access
+            options=[
+                selectinload(Trip.locations),
+                joinedload(Trip.request),
+                raiseload("*"),
+            ],
+            # A trip expired by a commit would otherwise be refreshed
+            # without these options
+            populate_existing=True,
         )
-        return self.db.execute(stmt).scalar_one_or_none()
 
     def update_trip(self, trip_id: int, response_json: dict) -> Optional[Trip]:
-        """Update a trip with response data."""
+        """Update a trip with response data.
+
+        Committed by the caller's unit_of_work().
+        """
         db_trip = self.get_trip(trip_id)
         if not db_trip:
             return None
 
         db_trip.response_json = response_json
-        self.db.commit()
-        self.db.refresh(db_trip)
+        self.db.flush()
         return db_trip
 
     def get_trips(self, limit: int = 100) -> List[Trip]:
@@ -114,52 +165,54 @@ class TripService:
         stmt = (
             select(Trip)
             .where(Trip.request_id == request_id)
-            .options(selectinload(Trip.locations), selectinload(Trip.request))
+            .options(
+                selectinload(Trip.locations),
+                selectinload(Trip.request),
+                raiseload("*"),
+            )
         )
         return self.db.execute(stmt).scalar_one_or_none()
 
 
-class LocationService:
+class LocationService(BaseService):
     """Service class for location operations."""
 
-    def __init__(self, db: Session):
-        self.db = db
-
     def create_location(self, location_data: LocationCreate) -> Location:
-        """Create a new location."""
-        db_location = Location(**location_data.model_dump())
+        """Create a new location. Committed by the caller's unit_of_work()."""
+        db_location = Location(**_field_values(location_data))
         self.db.add(db_location)
-        self.db.commit()
-        self.db.refresh(db_location)
+        self.db.flush()
         return db_location
 
     def bulk_create_locations(
         self, locations_data: List[LocationCreate]
     ) -> List[Location]:
-        """Bulk create locations."""
+        """Bulk create locations with a single multi-row INSERT."""
         try:
-            # Create all location instances first
-            db_locations = []
-            for data in locations_data:
-                location_dict = data.model_dump(exclude_none=True)
-                logger.debug("Creating location with data: %s", location_dict)
-                location = Location(**location_dict)
-                self.db.add(location)
-                db_locations.append(location)
-
-            # Flush to get IDs but don't commit yet
-            self.db.flush()
-            logger.debug("Successfully flushed %d locations", len(db_locations))
+            # Every row has the same keys (None included), so the INSERT is
+            # sent as one batch
+            rows = [
+                {key: getattr(data, key) for key in _LOCATION_KEYS}
+                for data in locations_data
+            ]
+            logger.debug("Creating %d locations with data: %s", len(rows), rows)
+            # RETURNING the entities avoids selecting the new rows back.
+            # Rows are re-sorted here: sort_by_parameter_order would make
+            # SQLite fall back to one INSERT per row.
+            stmt = insert(Location).returning(Location)
+            db_locations = sorted(
+                self.db.execute(stmt, rows).scalars(),
+                key=lambda location: (location.order is None, location.order),
+            )
+            logger.debug("Successfully inserted %d locations", len(db_locations))
             return db_locations
         except Exception as e:
             logger.error("Error in bulk_create_locations: %s", str(e), exc_info=True)
-            self.db.rollback()
             raise
 
     def get_location(self, location_id: int) -> Optional[Location]:
-        """Get a location by ID."""
-        stmt = select(Location).where(Location.id == location_id)
-        return self.db.execute(stmt).scalar_one_or_none()
+        """Get a location by ID (from the identity map if already loaded)."""
+        return self.db.get(Location, location_id)
 
     def get_locations_by_trip(self, trip_id: int) -> List[Location]:
         """Get locations for a specific trip."""
@@ -173,7 +226,10 @@ class LocationService:
     def create_locations_for_trip(
         self, trip_id: int, locations_data: List[LocationCreate]
     ) -> List[Location]:
-        """Create multiple locations for a trip."""
+        """Create multiple locations for a trip.
+
+        Committed by the caller's unit_of_work().
+        """
         try:
             if not trip_id:
                 raise ValueError("trip_id must be provided")
@@ -186,12 +242,9 @@ class LocationService:
             logger.debug(
                 "Creating %d locations for trip %d", len(locations_data), trip_id
             )
-            locations = self.bulk_create_locations(locations_data)
-            self.db.commit()
-            return locations
+            return self.bulk_create_locations(locations_data)
         except Exception as e:
             logger.error(
                 "Error in create_locations_for_trip: %s", str(e), exc_info=True
             )
-            self.db.rollback()
             raise
@@ -1,14 +1,47 @@
 import logging
+from functools import lru_cache
 from typing import Dict
 import math
-from operator import itemgetter
 
+import numpy as np
 import pydantic
 from app.schemas import LocationCreate, TripResponse
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+# Validates a whole list of locations in a single pydantic-core call
+_LocCreateListAdapter = pydantic.TypeAdapter(list[LocationCreate])
+
+# Up to this many locations (the usual size of a predicted trip) the plain
+# Python loop is faster than setting up the NumPy arrays
+SCALAR_MAX_LOCATIONS = 25
+# From this many locations the numba-compiled loop is worth its one-off
+# import and compile (or cache load) time
+NUMBA_MIN_LOCATIONS = 500
+# Below this many locations the per-query overhead of the KD-tree costs more
+# than the numba loop (about even at 2000 points, 2.5x faster at 5000)
+KDTREE_MIN_LOCATIONS = 2000
+# Neighbours fetched per KD-tree query before widening the search
+KDTREE_NEIGHBOURS = 32
+
+
+def _haversine_a(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Calculate the inner Haversine term between two points given in degrees.
+    It is monotonic in the distance, so it can be compared directly when
+    only the closest point is needed.
+    """
+    # Convert latitude and longitude to radians
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    return (
+        math.sin(dlat / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    )
+
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -22,13 +55,8 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     """
     R = 6371  # Earth's radius in kilometers
 
-    # Convert latitude and longitude to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-
     # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    a = _haversine_a(lat1, lon1, lat2, lon2)
     c = 2 * math.asin(math.sqrt(a))
 
     return R * c
@@ -44,36 +72,218 @@ def order_locations_by_distance(locations: list[Dict]) -> list[Dict]:
     if not locations:
         return locations
 
+    # Radians and cos(latitude) computed once per location, indexed by
+    # location, instead of for every comparison
+    lat_rad = [math.radians(loc["latitude"]) for loc in locations]
+    lon_rad = [math.radians(loc["longitude"]) for loc in locations]
+    cos_lat = [math.cos(lat) for lat in lat_rad]
+    sin = math.sin
+
     # Keep first location as reference point
-    ordered = [locations[0]]
-    remaining = locations[1:]
+    order = [0]
+    remaining = list(range(1, len(locations)))
 
     while remaining:
         # Get the last added location's coordinates
-        last = ordered[-1]
-        last_lat, last_lon = last["latitude"], last["longitude"]
+        last = order[-1]
+        last_lat, last_lon, last_cos = lat_rad[last], lon_rad[last], cos_lat[last]
+
+        # Find the position of the closest remaining location; the haversine
+        # term (see _haversine_a) is enough to compare distances
+        def haversine_a(i: int) -> float:
+            j = remaining[i]
+            return (
+                sin((lat_rad[j] - last_lat) / 2) ** 2
+                + last_cos * cos_lat[j] * sin((lon_rad[j] - last_lon) / 2) ** 2
+            )
 
-        # Find the closest remaining location
-        distances = [
-            (loc, haversine_distance(last_lat, last_lon, loc["latitude"], loc["longitude"]))
-            for loc in remaining
-        ]
-        closest_loc, _ = min(distances, key=itemgetter(1))
+        closest_i = min(range(len(remaining)), key=haversine_a)
 
-        ordered.append(closest_loc)
-        remaining.remove(closest_loc)
+        # Remove by position, not by comparing location dicts
+        order.append(remaining.pop(closest_i))
 
+    ordered = [locations[i] for i in order]
     return ordered
 
 
+def _greedy_order_mask(
+    lat_rad: np.ndarray, lon_rad: np.ndarray, cos_lat: np.ndarray
+) -> list[int]:
+    """
+    Nearest-neighbour order computed against all remaining points per step.
+    Only the haversine term is compared, it is monotonic in the distance.
+    """
+    count = len(lat_rad)
+    remaining = np.ones(count, dtype=bool)
+    remaining[0] = False
+    order = [0]
+    last = 0
+
+    for _ in range(count - 1):
+        candidates = np.flatnonzero(remaining)
+        a = (
+            np.sin((lat_rad[candidates] - lat_rad[last]) / 2) ** 2
+            + cos_lat[last]
+            * cos_lat[candidates]
+            * np.sin((lon_rad[candidates] - lon_rad[last]) / 2) ** 2
+        )
+        # argmin returns the first minimum, like min() in the scalar version
+        last = int(candidates[np.argmin(a)])
+        remaining[last] = False
+        order.append(last)
+
+    return order
+
+
+def _greedy_order_loop(
+    lat_rad: np.ndarray, lon_rad: np.ndarray, cos_lat: np.ndarray
+) -> np.ndarray:
+    """
+    Nearest-neighbour order as a scalar loop over the remaining points,
+    comparing the haversine term. Written for numba, which compiles it in
+    _load_greedy_order_numba; too slow to run interpreted.
+    """
+    count = len(lat_rad)
+    order = np.empty(count, dtype=np.int64)
+    visited = np.zeros(count, dtype=np.bool_)
+    order[0] = 0
+    visited[0] = True
+    last = 0
+
+    for step in range(1, count):
+        best = -1
+        best_a = np.inf
+        for i in range(count):
+            if visited[i]:
+                continue
+            a = (
+                np.sin((lat_rad[i] - lat_rad[last]) / 2) ** 2
+                + cos_lat[last]
+                * cos_lat[i]
+                * np.sin((lon_rad[i] - lon_rad[last]) / 2) ** 2
+            )
+            if a < best_a:
+                best_a = a
+                best = i
+        order[step] = best
+        visited[best] = True
+        last = best
+
+    return order
+
+
+@lru_cache(maxsize=1)
+def _load_greedy_order_numba():
+    """Return _greedy_order_loop compiled with numba, or None without numba."""
+    # numba is optional and slow to import, and compiling (or loading the
+    # cached machine code) takes a while, so it is done on first use
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True, fastmath=True)(_greedy_order_loop)
+
+
+@lru_cache(maxsize=1)
+def _load_ckdtree():
+    """Return scipy's cKDTree, or None when scipy is not installed."""
+    # scipy is optional and slow to import, so it is only imported once a
+    # list is long enough for the KD-tree
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return None
+    return cKDTree
+
+
+def _greedy_order_kdtree(
+    lat_rad: np.ndarray, lon_rad: np.ndarray, cos_lat: np.ndarray
+) -> list[int]:
+    """
+    Nearest-neighbour order using a KD-tree over unit-sphere coordinates.
+    The chord distance between the points is monotonic in the great-circle
+    distance, so the nearest unvisited neighbour is the same.
+    """
+    count = len(lat_rad)
+    xyz = np.stack(
+        [cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)],
+        axis=1,
+    )
+    tree = _load_ckdtree()(xyz)
+    visited = np.zeros(count, dtype=bool)
+    visited[0] = True
+    order = [0]
+    last = 0
+
+    for _ in range(count - 1):
+        k = min(KDTREE_NEIGHBOURS, count)
+        while True:
+            _, neighbours = tree.query(xyz[last], k=k)
+            unvisited = neighbours[~visited[neighbours]]
+            if unvisited.size:
+                break
+            # All of the k nearest are visited already, look further
+            k = min(k * 2, count)
+        last = int(unvisited[0])
+        visited[last] = True
+        order.append(last)
+
+    return order
+
+
+def order_locations_by_distance_np(locations: list[Dict]) -> list[Dict]:
+    """
+    Order locations by nearest neighbour, starting from the first location.
+    Same ordering as order_locations_by_distance, which is used directly for
+    up to SCALAR_MAX_LOCATIONS locations. Longer lists are ordered on NumPy
+    arrays: with a KD-tree from KDTREE_MIN_LOCATIONS locations when scipy is
+    installed, with the numba-compiled loop from NUMBA_MIN_LOCATIONS
+    locations when numba is installed, and otherwise with a vectorized scan
+    of the remaining locations per step.
+
+    :param locations: List of location dictionaries with latitude and longitude
+    :return: Ordered list of locations
+    """
+    if len(locations) <= SCALAR_MAX_LOCATIONS:
+        return order_locations_by_distance(locations)
+
+    # Convert the coordinates to arrays once; radians and cos(latitude) do
+    # not change between steps
+    count = len(locations)
+    lat_rad = np.radians(
+        np.fromiter(
+            (loc["latitude"] for loc in locations), dtype=np.float64, count=count
+        )
+    )
+    lon_rad = np.radians(
+        np.fromiter(
+            (loc["longitude"] for loc in locations), dtype=np.float64, count=count
+        )
+    )
+    cos_lat = np.cos(lat_rad)
+
+    # The optional dependencies are only loaded for lists long enough to use
+    if count >= KDTREE_MIN_LOCATIONS and _load_ckdtree() is not None:
+        order = _greedy_order_kdtree(lat_rad, lon_rad, cos_lat)
+    elif count >= NUMBA_MIN_LOCATIONS and _load_greedy_order_numba() is not None:
+        order = _load_greedy_order_numba()(lat_rad, lon_rad, cos_lat)
+    else:
+        order = _greedy_order_mask(lat_rad, lon_rad, cos_lat)
+
+    return [locations[i] for i in order]
+
+
 def validate_prediction_locations(
     prediction_locations_list: list[Dict],
+    skip_reorder: bool = False,
 ) -> list[LocationCreate]:
     """
     Validate and convert the prediction locations list to a list of LocationCreate objects.
     Orders locations based on geographical distance from the first location.
 
     :param prediction_locations_list: List of dictionaries containing location data.
+    :param skip_reorder: Keep the given order, e.g. when the prompt already
+        asks for the locations in travel order.
     :return: List of LocationCreate objects ordered by geographical proximity.
     :raises HTTPException: If validation fails or no locations are generated.
     """
@@ -82,12 +292,15 @@ def validate_prediction_locations(
         raise HTTPException(status_code=400, detail="No locations generated")
 
     # Order locations based on geographical distance
-    ordered_locations = order_locations_by_distance(prediction_locations_list)
+    if skip_reorder or len(prediction_locations_list) <= 1:
+        ordered_locations = prediction_locations_list
+    else:
+        ordered_locations = order_locations_by_distance_np(prediction_locations_list)
     try:
-        locations_list = [
-            LocationCreate(trip_id=None, **location)
-            for location in ordered_locations
-        ]
+        # New dicts: the originals are stored as the trip's response_json
+        locations_list = _LocCreateListAdapter.validate_python(
+            [{**location, "trip_id": None} for location in ordered_locations]
+        )
     except pydantic.ValidationError as e:
         logger.error("Validation error in locations: %s", str(e), exc_info=True)
         raise HTTPException(
@@ -118,7 +331,8 @@ def validate_trip_response(trip, request_data, locations) -> TripResponse:
             created_at=trip.created_at,
             trip_type=trip.trip_type,
         )
-        logger.debug("Validated response: %s", response.model_dump())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Validated response: %s", response.model_dump())
         return response
     except pydantic.ValidationError as e:
         logger.error(
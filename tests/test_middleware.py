@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.middleware import RequestLoggingMiddleware, drain_request_logs
+from app.schemas import RequestCreate
+
+
+def create_app(log_queue=None):
+    """App with the logging middleware but without the drain task."""
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware)
+    if log_queue is not None:
+        app.state.log_queue = log_queue
+
+    @app.post("/echo")
+    async def echo(payload: dict, request: Request):
+        # Like the trip routes: add the body to the pending request data
+        pending: RequestCreate = request.state.request_data
+        request.state.request_data = pending.model_copy(update={"body": payload})
+        return payload
+
+    @app.get("/ping")
+    async def ping():
+        return {"ping": "pong"}
+
+    return app
+
+
+def test_middleware_queues_request_body():
+    queue = asyncio.Queue()
+    client = TestClient(create_app(queue))
+
+    before = datetime.now(timezone.utc)
+    response = client.post("/echo", json={"request_text": "Paris"})
+    after = datetime.now(timezone.utc)
+
+    assert response.status_code == 200
+    queued = queue.get_nowait()
+    # Arrival time, not the time the row is written
+    assert before <= queued["created_at"] <= after
+    assert queued["method"] == "POST"
+    assert queued["url"] == "http://testserver/echo"
+    assert queued["body"] == {"request_text": "Paris"}
+    assert queued["headers"]["User-Agent"] == "testclient"
+    assert queue.empty()
+
+
+def test_middleware_skips_bypass_paths():
+    queue = asyncio.Queue()
+    client = TestClient(create_app(queue))
+
+    assert client.get("/health").status_code == 404
+    assert client.get("/ping").status_code == 200
+
+    assert queue.get_nowait()["url"] == "http://testserver/ping"
+    assert queue.empty()
+
+
+def test_middleware_without_log_queue():
+    # The lifespan did not run, so there is no queue to write to
+    client = TestClient(create_app())
+
+    assert client.get("/ping").status_code == 200
+
+
+def test_middleware_drops_requests_when_queue_is_full():
+    queue = asyncio.Queue(maxsize=1)
+    client = TestClient(create_app(queue))
+
+    assert client.get("/ping").status_code == 200
+    assert client.get("/ping").status_code == 200
+
+    assert queue.qsize() == 1
+
+
+def test_drain_request_logs_shutdown_flush_error(monkeypatch):
+    def failing_write(batch):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr("app.middleware._write_request_logs", failing_write)
+
+    async def run():
+        queue = asyncio.Queue()
+        task = asyncio.create_task(drain_request_logs(queue))
+        await asyncio.sleep(0)
+        queue.put_nowait({"method": "GET", "url": "http://test/"})
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
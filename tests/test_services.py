@@ -0,0 +1,163 @@
+from contextlib import contextmanager
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import event, func, select
+
+from app.models import Location, Request, Trip
+from app.schemas import (
+    LocationCreate,
+    RequestCreate,
+    RequestResponse,
+    TripCreate,
+    TripResponse,
+)
+from app.services import LocationService, RequestService, TripService
+from tests.test_locations import MOCK_LOCATIONS
+
+
+@contextmanager
+def count_statements(db_session):
+    """Collect the SQL statements executed on the session's engine."""
+    statements = []
+    engine = db_session.get_bind()
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def create_trip_request(db_session, with_trip=True):
+    """Store a request, optionally with a trip of MOCK_LOCATIONS."""
+    trip_service = TripService(db_session)
+    with trip_service.unit_of_work():
+        request = RequestService(db_session).create_request(
+            RequestCreate(method="POST", url="http://test/trip/")
+        )
+        if not with_trip:
+            return request.id, None
+        trip = trip_service.create_trip(
+            TripCreate(
+                request_id=request.id,
+                response_json=MOCK_LOCATIONS,
+                num_places=len(MOCK_LOCATIONS),
+            )
+        )
+        LocationService(db_session).create_locations_for_trip(
+            trip_id=trip.id,
+            locations_data=[
+                LocationCreate(trip_id=None, **location)
+                for location in MOCK_LOCATIONS
+            ],
+        )
+        return request.id, trip.id
+
+
+def test_get_requests_loads_trips_without_extra_queries(db_session):
+    create_trip_request(db_session)
+    create_trip_request(db_session)
+    create_trip_request(db_session, with_trip=False)
+    db_session.expunge_all()
+
+    with count_statements(db_session) as statements:
+        requests = RequestService(db_session).get_requests()
+        response = TypeAdapter(list[RequestResponse]).validate_python(
+            requests, from_attributes=True
+        )
+
+    # requests, then their trips, then the trips' locations
+    assert len(statements) == 3
+    assert len(response) == 3
+    assert sum(request.trip is not None for request in response) == 2
+
+
+def test_get_requests_only_trips_without_extra_queries(db_session):
+    create_trip_request(db_session)
+    create_trip_request(db_session, with_trip=False)
+    db_session.expunge_all()
+
+    with count_statements(db_session) as statements:
+        requests = RequestService(db_session).get_requests(only_trips=True)
+        response = TypeAdapter(list[RequestResponse]).validate_python(
+            requests, from_attributes=True
+        )
+
+    assert len(statements) == 3
+    assert len(response) == 1
+    assert len(response[0].trip.locations) == len(MOCK_LOCATIONS)
+
+
+def test_get_trip_without_extra_queries(db_session):
+    request_id, trip_id = create_trip_request(db_session)
+    db_session.expunge_all()
+
+    with count_statements(db_session) as statements:
+        trip = TripService(db_session).get_trip(trip_id)
+        response = TripResponse.model_validate(trip)
+        assert trip.request.id == request_id
+
+    # the trip joined with its request, then its locations
+    assert len(statements) == 2
+    assert len(response.locations) == len(MOCK_LOCATIONS)
+
+
+def test_get_trip_after_commit_applies_loader_options(db_session):
+    # Like the trip routes: the new trip stays in the session, expired by
+    # the commit, and is then fetched again with its locations
+    trip_service = TripService(db_session)
+    with trip_service.unit_of_work():
+        request = RequestService(db_session).create_request(
+            RequestCreate(method="POST", url="http://test/trip/")
+        )
+        trip = trip_service.create_trip(TripCreate(request_id=request.id))
+        trip_id = trip.id
+        LocationService(db_session).create_locations_for_trip(
+            trip_id=trip_id,
+            locations_data=[
+                LocationCreate(trip_id=None, **location)
+                for location in MOCK_LOCATIONS
+            ],
+        )
+
+    with count_statements(db_session) as statements:
+        assert trip_service.get_trip(trip_id) is trip
+        response = TripResponse.model_validate(trip)
+        trip.request.id
+
+    assert len(statements) == 2
+    assert len(response.locations) == len(MOCK_LOCATIONS)
+
+
+def count_rows(db_session, model):
+    return db_session.scalar(select(func.count()).select_from(model))
+
+
+def test_unit_of_work_commits_all_writes(db_session):
+    create_trip_request(db_session)
+    db_session.rollback()
+
+    assert count_rows(db_session, Request) == 1
+    assert count_rows(db_session, Trip) == 1
+    assert count_rows(db_session, Location) == len(MOCK_LOCATIONS)
+
+
+def test_unit_of_work_rolls_back_on_error(db_session):
+    trip_service = TripService(db_session)
+    with pytest.raises(ValueError):
+        with trip_service.unit_of_work():
+            request = RequestService(db_session).create_request(
+                RequestCreate(method="POST", url="http://test/trip/")
+            )
+            trip_service.create_trip(TripCreate(request_id=request.id))
+            # Fails after the request and trip were flushed
+            LocationService(db_session).create_locations_for_trip(
+                trip_id=None, locations_data=[]
+            )
+
+    assert count_rows(db_session, Request) == 0
+    assert count_rows(db_session, Trip) == 0
@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.utils import (
+    _greedy_order_kdtree,
+    _greedy_order_mask,
+    _load_ckdtree,
+    _load_greedy_order_numba,
+    order_locations_by_distance,
+    order_locations_by_distance_np,
+)
+from tests.test_locations import MOCK_LOCATIONS
+
+
+def random_locations(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": str(i),
+            "latitude": rng.uniform(-80, 80),
+            "longitude": rng.uniform(-179, 179),
+        }
+        for i in range(count)
+    ]
+
+
+def to_arrays(locations):
+    lat_rad = np.radians([loc["latitude"] for loc in locations])
+    lon_rad = np.radians([loc["longitude"] for loc in locations])
+    return lat_rad, lon_rad, np.cos(lat_rad)
+
+
+def names(locations):
+    return [loc["name"] for loc in locations]
+
+
+def scalar_order(locations):
+    """Indices in the order of the reference scalar loop."""
+    return [int(loc["name"]) for loc in order_locations_by_distance(locations)]
+
+
+def test_order_mock_locations():
+    # Kyiv is closer to Berlin than to Paris
+    ordered = order_locations_by_distance_np(MOCK_LOCATIONS)
+    assert names(ordered) == ["Eiffel Tower", "Berlin", "Kyiv"]
+    assert order_locations_by_distance(MOCK_LOCATIONS) == ordered
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 5, 25, 26, 60, 600])
+def test_order_np_matches_scalar(count):
+    locations = random_locations(count, seed=count)
+    assert order_locations_by_distance_np(locations) == (
+        order_locations_by_distance(locations)
+    )
+
+
+@pytest.mark.parametrize("count", [2, 5, 60, 300])
+def test_greedy_order_mask_matches_scalar(count):
+    locations = random_locations(count, seed=count)
+    order = _greedy_order_mask(*to_arrays(locations))
+    assert list(order) == scalar_order(locations)
+
+
+@pytest.mark.parametrize("count", [2, 5, 60, 300])
+def test_greedy_order_numba_matches_scalar(count):
+    greedy_order_numba = _load_greedy_order_numba()
+    if greedy_order_numba is None:
+        pytest.skip("numba is not installed")
+    locations = random_locations(count, seed=count)
+    order = greedy_order_numba(*to_arrays(locations))
+    assert order.tolist() == scalar_order(locations)
+
+
+@pytest.mark.parametrize("count", [2, 5, 60, 300])
+def test_greedy_order_kdtree_matches_scalar(count):
+    if _load_ckdtree() is None:
+        pytest.skip("scipy is not installed")
+    locations = random_locations(count, seed=count)
+    order = _greedy_order_kdtree(*to_arrays(locations))
+    assert order == scalar_order(locations)